@@ -1,12 +1,17 @@
 import os
-import json
-import requests
+import orjson
+import math
+import hashlib
 import asyncio
+import aiohttp
 import re
+import random
+import time
+import threading
 from datetime import datetime, timezone, timedelta
-from collections import deque
 from telegram import Bot
-from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, Application
+from telegram.request import HTTPXRequest
+from telegram.ext import AIORateLimiter, ApplicationBuilder, CommandHandler, ContextTypes, Application
 import logging
 from dotenv import load_dotenv
 
@@ -23,39 +28,98 @@ SUBSCRIBERS_FILE = os.getenv("SUBSCRIBERS_FILE", "subscribed_users.json")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# === DEDUP ===
+class SentFilter:
+    # Bloom filter of sent URLs/titles; a full generation rotates out, so memory stays fixed
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.current = bytearray((self.num_bits + 7) // 8)
+        self.previous = bytearray(len(self.current))
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _has(bits, positions):
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __contains__(self, item):
+        positions = self._positions(item)
+        return self._has(self.current, positions) or self._has(self.previous, positions)
+
+    def add(self, item):
+        positions = self._positions(item)
+        if self._has(self.current, positions):
+            return
+        if self.count >= self.capacity:
+            self.previous, self.current = self.current, bytearray(len(self.current))
+            self.count = 0
+        for p in positions:
+            self.current[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
 # === GLOBALS ===
 subscribed_users = set()
-sent_news_deque = deque(maxlen=500)
-sent_news_urls = set()
+subscribers_dirty = False  # set by /start, cleared when subscribers_flusher writes the file
+user_queues = {}  # chat id -> queue of message batches consumed by that chat's user_worker
+user_workers = {}  # chat id -> that chat's user_worker task, cancelled on shutdown
+background_tasks = []  # scheduled_job and subscribers_flusher, cancelled on shutdown
+subscribers_file_lock = threading.Lock()  # one writer at a time on the .tmp file
+sent_news = SentFilter(capacity=1000, error_rate=0.001)  # ~2 hours of URLs + titles per generation
+
+# The main bot is the Application's own bot (set in on_startup) so sends share its connection pool
+main_bot = None
+notify_bot = Bot(token=SECOND_BOT_TOKEN, request=HTTPXRequest(connection_pool_size=4, pool_timeout=5))
+
+# Shared NewsAPI session and send limiter, created in on_startup once the event loop is running
+http_session = None
+send_semaphore = None
+news_cache_lock = None
 
-main_bot = Bot(token=FIRST_BOT_TOKEN)
-notify_bot = Bot(token=SECOND_BOT_TOKEN)
+# Conditional-GET headers taken from the last NewsAPI response
+newsapi_validators = {}
+
+# Last on-demand fetch as (time.monotonic() timestamp, messages)
+news_cache = (float("-inf"), [])
 
 # === HELPERS ===
 def load_subscribers():
     try:
-        with open(SUBSCRIBERS_FILE, "r") as f:
-            return set(json.load(f))
+        with open(SUBSCRIBERS_FILE, "rb") as f:
+            return set(orjson.loads(f.read()))
     except Exception:
         return set()
 
 def save_subscribers(subscribers):
-    with open(SUBSCRIBERS_FILE, "w") as f:
-        json.dump(list(subscribers), f)
+    # Write then rename so a crash mid-write never leaves a truncated file
+    # A cancelled to_thread save keeps running, so the final flush may overlap it
+    tmp_path = f"{SUBSCRIBERS_FILE}.tmp"
+    with subscribers_file_lock:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(list(subscribers)))
+        os.replace(tmp_path, SUBSCRIBERS_FILE)
 
 def remember_url(url):
-    if url not in sent_news_urls:
-        sent_news_urls.add(url)
-        sent_news_deque.append(url)
-        if len(sent_news_deque) == sent_news_deque.maxlen:
-            oldest = sent_news_deque.popleft()
-            sent_news_urls.discard(oldest)
+    sent_news.add(url)
+
+# MarkdownV2 reserved characters, each mapped to its backslash-escaped form
+MDV2_SPECIAL_CHARS = r"\_*[]()~`>#+=|{}.!-"
+MDV2_ESCAPE_TABLE = str.maketrans({c: "\\" + c for c in MDV2_SPECIAL_CHARS})
+MDV2_SPECIAL_RE = re.compile(f"[{re.escape(MDV2_SPECIAL_CHARS)}]")
 
 def safe_md(text: str) -> str:
     if not text:
         return ""
-    escape_chars = r"_*[]()~`>#+=|{}.!-"
-    return re.sub(f"([{re.escape(escape_chars)}])", r"\\\1", text)
+    # Most source names need no escaping; skip the translate copy for them
+    if not MDV2_SPECIAL_RE.search(text):
+        return text
+    return text.translate(MDV2_ESCAPE_TABLE)
 
 # === CLASSIFICATION ===
 TOP_COMPANIES = ["Apple", "Microsoft", "Amazon", "Tesla", "Google", "Meta", "Nvidia", "Netflix", "Intel", "IBM"]
@@ -74,127 +138,263 @@ COUNTRY_KEYWORDS = {
     "🇨🇦": ["Canada", "Ottawa"]
 }
 
-def classify_article(title, description):
-    text = (title + " " + description).lower()
-    if any(company.lower() in text for company in TOP_COMPANIES):
-        return "🏢 *Top Company News*"
-    elif any(keyword in text for keyword in CRYPTO_KEYWORDS):
-        return "🪙 *Crypto Market*"
-    elif any(keyword in text for keyword in ECONOMY_KEYWORDS):
-        for flag, keywords in COUNTRY_KEYWORDS.items():
-            if any(k.lower() in text for k in keywords):
-                return f"{flag} *Economic News*"
-        return "🌍 *Global/Economic*"
+# Short acronyms that collide with ordinary words ("us", "federal", "define");
+# these only match as whole words with exact case, everything else is a case-insensitive substring
+EXACT_WORD_KEYWORDS = {"US", "Fed", "DeFi"}
+
+def keyword_term(keyword):
+    if keyword in EXACT_WORD_KEYWORDS:
+        return rf"(?-i:\b{re.escape(keyword)}\b)"
+    return re.escape(keyword)
+
+def keyword_pattern(keywords):
+    return re.compile("|".join(map(keyword_term, keywords)), re.IGNORECASE)
+
+# Compiled once at import; each category is a single case-insensitive search
+COMPANY_RE = keyword_pattern(TOP_COMPANIES)
+CRYPTO_RE = keyword_pattern(CRYPTO_KEYWORDS)
+ECONOMY_RE = keyword_pattern(ECONOMY_KEYWORDS)
+COUNTRY_RES = [(flag, keyword_pattern(keywords)) for flag, keywords in COUNTRY_KEYWORDS.items()]
+
+def detect_country(text):
+    for flag, pattern in COUNTRY_RES:
+        if pattern.search(text):
+            return flag
+    return None
+
+def classify_article(text):
+    # Returns (category, country flag or None); the country scan runs at most once
+    if COMPANY_RE.search(text):
+        return "🏢 *Top Company News*", detect_country(text)
+    elif CRYPTO_RE.search(text):
+        return "🪙 *Crypto Market*", detect_country(text)
+    elif ECONOMY_RE.search(text):
+        flag = detect_country(text)
+        if flag:
+            return f"{flag} *Economic News*", flag
+        return "🌍 *Global/Economic*", None
     else:
-        return "📰 *Other News*"
+        return "📰 *Other News*", None
 
 # === FETCH & SEND ===
-async def send_daily_update(chat_id):
-    try:
-        query = (
-            "Apple OR Microsoft OR Amazon OR Tesla OR Nvidia OR "
-            "Bitcoin OR Ethereum OR crypto OR blockchain OR "
-            "inflation OR interest rates OR GDP OR recession OR Fed OR RBI OR "
-            "United States OR China OR Japan OR Germany OR India OR UK OR France OR Italy OR Brazil OR Canada"
-        )
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+NEWSAPI_QUERY = (
+    "Apple OR Microsoft OR Amazon OR Tesla OR Nvidia OR "
+    "Bitcoin OR Ethereum OR crypto OR blockchain OR "
+    "inflation OR interest rates OR GDP OR recession OR Fed OR RBI OR "
+    "United States OR China OR Japan OR Germany OR India OR UK OR France OR Italy OR Brazil OR Canada"
+)
+NEWSAPI_PARAMS = {
+    "q": NEWSAPI_QUERY,
+    "language": "en",
+    "pageSize": 30,
+    "sortBy": "publishedAt",
+}
+# Sent as a header rather than a query param so the key never shows up in logged URLs
+NEWSAPI_HEADERS = {"X-Api-Key": NEWSAPI_KEY}
+
+NEWS_WINDOW = timedelta(hours=2)  # CHANGED TO 2 HOURS
+
+ALLOWED_CATEGORIES = [
+    "🏢 *Top Company News*", "🪙 *Crypto Market*", "🌍 *Global/Economic*",
+    "🇺🇸 *Economic News*", "🇨🇳 *Economic News*", "🇯🇵 *Economic News*", 
+    "🇩🇪 *Economic News*", "🇮🇳 *Economic News*", "🇬🇧 *Economic News*",
+    "🇫🇷 *Economic News*", "🇮🇹 *Economic News*", "🇧🇷 *Economic News*", 
+    "🇨🇦 *Economic News*"
+]
+
+BANNED_SOURCES = ["slickdeals", "espn", "goal.com", "vogue", "buzzfeed", "people.com"]
+BANNED_SOURCES_RE = keyword_pattern(BANNED_SOURCES)  # substring match, so "ESPN FC" is banned too
+
+NEWS_CACHE_TTL = 60  # seconds an on-demand fetch is reused for /start and /update
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_ATTEMPTS = 3
+
+MESSAGE_LIMIT = 4096  # Telegram's maximum message length
+MESSAGE_SEPARATOR = "\n\n———\n\n"
+
+def batch_messages(items, limit=MESSAGE_LIMIT):
+    # Group (message, ...) tuples so each group's joined messages fit in one Telegram message
+    batches, current, length = [], [], 0
+    for item in items:
+        extra = len(item[0]) + (len(MESSAGE_SEPARATOR) if current else 0)
+        if current and length + extra > limit:
+            batches.append(current)
+            current, length = [], 0
+            extra = len(item[0])
+        current.append(item)
+        length += extra
+    if current:
+        batches.append(current)
+    return batches
+
+def format_message(a, cutoff):
+    # Returns (MarkdownV2 message, plain-text fallback), or None if the article is filtered out
+    # NewsAPI sends explicit nulls for missing fields, so default with `or`
+    title_raw = a.get("title") or ""
+    description_raw = a.get("description") or ""
+    content_raw = a.get("content") or ""
+    published_raw = a.get("publishedAt") or ""
+    source_raw = (a.get("source") or {}).get("name") or ""
+
+    if BANNED_SOURCES_RE.search(source_raw):
+        return None
 
+    try:
+        # fromisoformat is C-implemented and much cheaper than strptime
+        published_dt = datetime.fromisoformat(published_raw.replace("Z", "+00:00"))
+        if published_dt < cutoff:
+            return None
+    except Exception:
+        return None
+
+    # Patterns are case-insensitive, so the raw text is matched without lowercasing
+    text = f"{title_raw} {description_raw}"
+    category, flag = classify_article(text)
+    if category not in ALLOWED_CATEGORIES:
+        return None
+
+    origin_flag = flag or "🌍"
+
+    full_text = f"{description_raw} {content_raw}".strip()
+    words = full_text.split()
+    if len(words) < 10:
+        return None
+    summary_raw = " ".join(words[:100]) + ("..." if len(words) > 100 else "")
+
+    title = safe_md(title_raw)
+    summary = safe_md(summary_raw)
+    source = safe_md(source_raw)
+    pub_time = safe_md(published_dt.strftime("%Y-%m-%d %H:%M"))
+    category_md = safe_md(category)
+
+    message = (
+        f"{origin_flag} {category_md}\n"
+        f"📌 *{title}*\n"
+        f"📰 _{source}_ \\| 🕒 {pub_time}\n\n"
+        f"🧠 *Summary:* {summary}"
+    )
+    fallback = f"{title_raw}\n\n{summary_raw}"
+    return message, fallback
+
+async def get_json(url, params, headers=None):
+    # Returns (response headers, parsed body), body None on 304; retries network errors and 429/5xx
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            async with http_session.get(url, params=params, headers=headers) as response:
+                if response.status >= 400:
+                    response.raise_for_status()
+                if response.status == 304:
+                    return response.headers, None
+                return response.headers, orjson.loads(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = getattr(e, "status", None)
+            # 401 apiKeyInvalid, 400, 426... won't change on retry, so fail straight away
+            if attempt == RETRY_ATTEMPTS or (status is not None and status not in RETRY_STATUSES):
+                raise
+            delay = min(2 ** (attempt - 1), 8) + random.uniform(0, 1)
+            reason = status or type(e).__name__
+            logger.warning(f"⚠️ NewsAPI request failed ({reason}), retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def fetch_news(record=True):
+    # None on failure; only the scheduler records sent articles/validators, on-demand passes record=False
+    try:
         now = datetime.now(timezone.utc)
-        from_time = now - timedelta(hours=2)  # CHANGED TO 2 HOURS
-
-        url = (
-            f"https://newsapi.org/v2/everything?q={query}&"
-            f"from={from_time.isoformat()}&to={now.isoformat()}&"
-            f"language=en&pageSize=30&sortBy=publishedAt&apiKey={NEWSAPI_KEY}"
-        )
-
-        response = requests.get(url)
-        articles = response.json().get("articles", [])
+        from_time = now - NEWS_WINDOW
+
+        # aiohttp URL-encodes the params, so the query's spaces are escaped properly
+        params = {**NEWSAPI_PARAMS, "from": from_time.isoformat(), "to": now.isoformat()}
+
+        validators = newsapi_validators if record else {}
+        headers, data = await get_json(NEWSAPI_URL, params, headers={**NEWSAPI_HEADERS, **validators})
+        if data is None:
+            logger.info(f"⏰ Checked at {now}, not modified since last poll")
+            return []
+
+        # Send the validators back next time so an unchanged result comes back as an empty 304
+        if record:
+            newsapi_validators.clear()
+            if "ETag" in headers:
+                newsapi_validators["If-None-Match"] = headers["ETag"]
+            if "Last-Modified" in headers:
+                newsapi_validators["If-Modified-Since"] = headers["Last-Modified"]
+
+        articles = data.get("articles", [])
         logger.info(f"⏰ Checked at {now}, {len(articles)} articles found")
 
-        if not articles:
-            await main_bot.send_message(chat_id=chat_id, text="⚠️ No new finance/economic news in the last 2 hours.")
-            return
-
-        ALLOWED_CATEGORIES = [
-            "🏢 *Top Company News*", "🪙 *Crypto Market*", "🌍 *Global/Economic*",
-            "🇺🇸 *Economic News*", "🇨🇳 *Economic News*", "🇯🇵 *Economic News*", 
-            "🇩🇪 *Economic News*", "🇮🇳 *Economic News*", "🇬🇧 *Economic News*",
-            "🇫🇷 *Economic News*", "🇮🇹 *Economic News*", "🇧🇷 *Economic News*", 
-            "🇨🇦 *Economic News*"
-        ]
-
-        BANNED_SOURCES = ["slickdeals", "espn", "goal.com", "vogue", "buzzfeed", "people.com"]
-
+        # Dedup once per fetch rather than per subscriber; every chat gets the same fresh batch
+        messages = []
+        seen = set()  # duplicates within this response
         for a in articles:
             article_url = a.get("url")
-            title_raw = a.get("title", "")
-            description_raw = a.get("description", "")
-            content_raw = a.get("content", "")
-            published_raw = a.get("publishedAt", "")
-            source_raw = a.get("source", {}).get("name", "")
-
-            if any(bad in source_raw.lower() for bad in BANNED_SOURCES):
+            title_raw = a.get("title") or ""
+            if article_url in sent_news or title_raw in sent_news or article_url in seen or title_raw in seen:
                 continue
-
             try:
-                published_dt = datetime.strptime(published_raw, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
-                if published_dt < now - timedelta(hours=2):
-                    continue
-            except Exception:
-                continue
-
-            if article_url in sent_news_urls or title_raw in sent_news_urls:
-                continue
-
-            category = classify_article(title_raw, description_raw)
-            if category not in ALLOWED_CATEGORIES:
-                continue
-
-            origin_flag = "🌍"
-            text = (title_raw + " " + description_raw).lower()
-            for flag, keywords in COUNTRY_KEYWORDS.items():
-                if any(k.lower() in text for k in keywords):
-                    origin_flag = flag
-                    break
-
-            full_text = f"{description_raw} {content_raw}".strip()
-            words = full_text.split()
-            if len(words) < 10:
+                formatted = format_message(a, from_time)
+            except Exception as e:
+                logger.warning(f"⚠️ Skipping malformed article {article_url}: {e}")
                 continue
-            summary_raw = " ".join(words[:100]) + ("..." if len(words) > 100 else "")
+            if formatted:
+                seen.update((article_url, title_raw))
+                if record:
+                    # Only remember what will actually go out
+                    remember_url(article_url)
+                    remember_url(title_raw)
+                messages.append(formatted)
+        return messages
 
-            title = safe_md(title_raw)
-            summary = safe_md(summary_raw)
-            source = safe_md(source_raw)
-            pub_time = safe_md(published_dt.strftime("%Y-%m-%d %H:%M"))
-            category_md = safe_md(category)
+    except Exception as e:
+        logger.error(f"❌ Fetch error: {e}")
+        return None
 
-            message = (
-                f"{origin_flag} {category_md}\n"
-                f"📌 *{title}*\n"
-                f"📰 _{source}_ \\| 🕒 {pub_time}\n\n"
-                f"🧠 *Summary:* {summary}"
-            )
+async def send_news(chat_id, messages):
+    if not messages:
+        async with send_semaphore:
+            await main_bot.send_message(chat_id=chat_id, text="⚠️ No new finance/economic news in the last 2 hours.")
+        return
 
+    # Coalesce articles into as few messages as fit, one round-trip per batch
+    for batch in batch_messages(messages):
+        async with send_semaphore:
             try:
                 await main_bot.send_message(
                     chat_id=chat_id,
-                    text=message,
+                    text=MESSAGE_SEPARATOR.join(message for message, _ in batch),
                     parse_mode="MarkdownV2",
                     disable_web_page_preview=True
                 )
-                remember_url(article_url)
-                remember_url(title_raw)
             except Exception as e:
                 logger.error(f"❌ Error sending message: {e}")
-                fallback = f"{title_raw}\n\n{summary_raw}"
+                # Plain-text fallbacks are shorter than their messages, so the batch still fits
+                fallback = MESSAGE_SEPARATOR.join(fallback for _, fallback in batch)
                 await main_bot.send_message(chat_id=chat_id, text=fallback)
 
-    except Exception as e:
-        logger.error(f"❌ Fetch error: {e}")
+async def get_cached_news():
+    # On-demand fetches reuse a result from the last NEWS_CACHE_TTL seconds
+    global news_cache
+    async with news_cache_lock:
+        fetched_at, messages = news_cache
+        if time.monotonic() - fetched_at >= NEWS_CACHE_TTL:
+            messages = await fetch_news(record=False)
+            if messages is None:
+                return None  # don't cache a failed fetch
+            news_cache = (time.monotonic(), messages)
+        return messages
+
+async def send_daily_update(chat_id):
+    messages = await get_cached_news()
+    if messages is None:
+        async with send_semaphore:
+            await main_bot.send_message(chat_id=chat_id, text="⚠️ Couldn't fetch news right now, please try again later.")
+        return
+    await send_news(chat_id, messages)
 
 # === COMMANDS ===
 async def start(update, context: ContextTypes.DEFAULT_TYPE):
+    global subscribers_dirty
     user = update.effective_user
     user_id = user.id
     full_name = f"{user.first_name} {user.last_name or ''}".strip()
@@ -202,7 +402,7 @@ async def start(update, context: ContextTypes.DEFAULT_TYPE):
 
     if user_id not in subscribed_users:
         subscribed_users.add(user_id)
-        save_subscribers(subscribed_users)
+        subscribers_dirty = True  # persisted by subscribers_flusher
 
     await update.message.reply_text("✅ Subscribed to finance, crypto, and global economic news!")
     await send_daily_update(chat_id=user_id)
@@ -226,31 +426,99 @@ async def error_handler(update, context):
     logger.error(f"⚠️ Uncaught error: {context.error}", exc_info=context.error)
 
 # === SCHEDULER ===
+async def user_worker(user_id, queue):
+    # One worker per chat: a slow or blocked chat only delays its own queue
+    while True:
+        messages = await queue.get()
+        try:
+            await send_news(user_id, messages)
+        except Exception as e:
+            logger.error(f"❌ Failed to send to {user_id}: {e}")
+
+def user_queue(user_id):
+    if user_id not in user_queues:
+        user_queues[user_id] = asyncio.Queue()
+        user_workers[user_id] = asyncio.create_task(user_worker(user_id, user_queues[user_id]))
+    return user_queues[user_id]
+
 async def scheduled_job():
     while True:
         logger.info("⏰ Running scheduled update")
-        for user_id in subscribed_users:
-            try:
-                await send_daily_update(chat_id=user_id)
-            except Exception as e:
-                logger.error(f"❌ Failed to send to {user_id}: {e}")
+        messages = await fetch_news()
+        if messages:
+            # Hand the batch to each chat's worker and get back to the schedule right away
+            for user_id in subscribed_users:
+                user_queue(user_id).put_nowait(messages)
+        else:
+            logger.info("📭 No new articles this tick")
         await asyncio.sleep(600)  # every 10 minutes
 
+async def flush_subscribers():
+    global subscribers_dirty
+    if not subscribers_dirty:
+        return
+    subscribers_dirty = False
+    try:
+        # Snapshot the set so the worker thread never sees it change mid-dump
+        await asyncio.to_thread(save_subscribers, subscribed_users.copy())
+    except Exception as e:
+        subscribers_dirty = True
+        logger.error(f"❌ Failed to save subscribers: {e}")
+
+async def subscribers_flusher():
+    while True:
+        await asyncio.sleep(30)
+        await flush_subscribers()
+
 # === MAIN ===
 def main():
     global subscribed_users
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass  # uvloop is optional (not available on Windows)
+
     subscribed_users = load_subscribers()
 
-    app = ApplicationBuilder().token(FIRST_BOT_TOKEN).build()
+    # Keeps the main bot under Telegram's ~30 msg/s cap and retries RetryAfter responses itself
+    rate_limiter = AIORateLimiter(overall_max_rate=25, overall_time_period=1, max_retries=3)
+    app = ApplicationBuilder().token(FIRST_BOT_TOKEN).rate_limiter(rate_limiter).build()
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("update", manual_update))
     app.add_error_handler(error_handler)
 
     async def on_startup(app):
+        global main_bot, http_session, send_semaphore, news_cache_lock
+        main_bot = app.bot
+        send_semaphore = asyncio.Semaphore(20)  # cap in-flight Telegram sends
+        news_cache_lock = asyncio.Lock()
+        http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300)
+        )
+        try:
+            await notify_bot.initialize()
+        except Exception as e:
+            # Notifications are best-effort; never keep the main bot from starting
+            logger.warning(f"⚠️ Notify bot init failed: {e}")
         await app.bot.delete_webhook()
-        asyncio.create_task(scheduled_job())
+        background_tasks.append(asyncio.create_task(scheduled_job()))
+        background_tasks.append(asyncio.create_task(subscribers_flusher()))
+
+    async def on_shutdown(app):
+        # Stop everything that might still fetch, send or save before the final flush
+        tasks = [*background_tasks, *user_workers.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await flush_subscribers()
+        if http_session:
+            await http_session.close()
+        await notify_bot.shutdown()
 
     app.post_init = on_startup
+    app.post_shutdown = on_shutdown
     app.run_polling()
 
 if __name__ == "__main__":